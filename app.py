@@ -1,25 +1,37 @@
 from flask import Flask, request, send_file, Response
 import requests
-from PIL import Image
+from requests.adapters import HTTPAdapter
 from io import BytesIO
-import tempfile
 import os
+import hashlib
+import re
+import subprocess
+import sys
+import threading
+import time
 from gtts import gTTS
-from pylint.lint import Run
-from pylint.reporters.text import TextReporter
-from io import StringIO
-import nltk
-from nltk.tokenize import sent_tokenize, word_tokenize
+from nltk.tokenize import PunktTokenizer
 from nltk.corpus import stopwords
-from collections import Counter
+from collections import Counter, OrderedDict
+import heapq
+from functools import lru_cache
+from concurrent.futures import ProcessPoolExecutor, TimeoutError as FutureTimeout
+from concurrent.futures.process import BrokenProcessPool
+from itertools import chain
 
-# Ensure NLTK data is available at startup
-try:
-    nltk.data.find('tokenizers/punkt_tab')
-    nltk.data.find('corpora/stopwords')
-except LookupError:
-    nltk.download('punkt_tab')
-    nltk.download('stopwords')
+# Load NLTK resources once instead of per request. The data is not downloaded at
+# runtime; fetch it ahead of time with `python -m nltk.downloader punkt_tab stopwords`
+# (the Dockerfile bakes it into the image).
+STOP_WORDS = frozenset(stopwords.words("english"))
+_SENT_TOK = PunktTokenizer("english")
+
+# Alphanumeric word runs in any script (same tokens the old isalnum() filter kept);
+# used instead of NLTK word tokenization for summaries
+_TOKEN_RE = re.compile(r"[^\W_]+", re.UNICODE)
+
+# ATS keywords keep inner/trailing + # . so "c++", "c#" and "node.js" stay whole,
+# while surrounding punctuation is dropped; single letters ("c", "r") still count
+_ATS_TOKEN_RE = re.compile(r"[^\W_](?:[\w+#.]*[\w+#])?", re.UNICODE)
 
 # PyMuPDF check
 try:
@@ -29,67 +41,198 @@ except ImportError:
 
 app = Flask(__name__)
 
+# Bound worst-case work per request (larger bodies get a 413 from Flask)
+app.config['MAX_CONTENT_LENGTH'] = 2 * 1024 * 1024
+MAX_TEXT_CHARS = 200_000
+
+# CPU-bound work (summaries, large PDFs) runs in worker processes so the
+# HTTP worker keeps serving other requests meanwhile. Each gunicorn worker
+# (WEB_CONCURRENCY, also read by gunicorn) gets its share of the CPUs.
+WEB_WORKERS = int(os.getenv("WEB_CONCURRENCY", "1"))
+POOL_SIZE = max(1, (os.cpu_count() or 1) // WEB_WORKERS)
+CPU_TASK_TIMEOUT = 30
+# Tasks allowed running or queued per pool process before new ones must wait
+POOL_QUEUE_DEPTH = 4
+
+class PoolBusy(Exception):
+    pass
+
+class _WorkerPool:
+    # Process pool with a bounded queue (max_workers * POOL_QUEUE_DEPTH tasks) that
+    # is rebuilt if a child process dies (which leaves a ProcessPoolExecutor
+    # permanently broken)
+
+    def __init__(self, max_workers):
+        self.max_workers = max_workers
+        self._slots = threading.BoundedSemaphore(max_workers * POOL_QUEUE_DEPTH)
+        self._lock = threading.Lock()
+        self._executor = ProcessPoolExecutor(max_workers=max_workers)
+
+    def run_all(self, fn, argsets, timeout):
+        # Waits for queue slots and results within one overall timeout. Raises
+        # PoolBusy if no slot frees up in time, FutureTimeout if the results are
+        # late, and BrokenProcessPool if a child died
+        deadline = time.monotonic() + timeout
+        taken = 0
+        while taken < len(argsets) and self._slots.acquire(timeout=max(0, deadline - time.monotonic())):
+            taken += 1
+        if taken < len(argsets):
+            for _ in range(taken):
+                self._slots.release()
+            raise PoolBusy()
+        executor = self._executor
+        futures = []
+        try:
+            for args in argsets:
+                future = executor.submit(fn, *args)
+                # Slots are freed when the task actually finishes, not when we stop waiting
+                future.add_done_callback(lambda _: self._slots.release())
+                futures.append(future)
+            return [f.result(timeout=max(0, deadline - time.monotonic())) for f in futures]
+        except FutureTimeout:
+            for f in futures:
+                f.cancel()
+            raise
+        except BrokenProcessPool:
+            self._reset(executor)
+            raise
+        finally:
+            for _ in range(len(argsets) - len(futures)):
+                self._slots.release()
+
+    def _reset(self, executor):
+        with self._lock:
+            if self._executor is executor:
+                executor.shutdown(wait=False, cancel_futures=True)
+                self._executor = ProcessPoolExecutor(max_workers=self.max_workers)
+
+# Separate pools so a crash while parsing a hostile PDF cannot take down summaries
+_SUMMARY_POOL = _WorkerPool(POOL_SIZE)
+_PDF_POOL = _WorkerPool(POOL_SIZE)
+
+# Large PDFs are split into page ranges (PyMuPDF is not thread-safe)
+PDF_PARALLEL_PAGES = 8
+
+def _page_words(pdf, start, stop):
+    words = set()
+    for i in range(start, stop):
+        words.update(_ATS_TOKEN_RE.findall(pdf[i].get_text().lower()))
+    return words
+
+def _pdf_chunk_words(data, start, stop):
+    with fitz.open(stream=data, filetype="pdf") as pdf:
+        return _page_words(pdf, start, stop)
+
+# Content-derived ETags for the static GET form pages so browsers/CDNs can revalidate with a 304
+CACHE_MAX_AGE = 3600
+
+def _etag(body):
+    return hashlib.blake2b(body, digest_size=8).hexdigest()
+
+def _html_page(body, etag):
+    response = Response(body, mimetype='text/html')
+    response.set_etag(etag)
+    response.cache_control.public = True
+    response.cache_control.max_age = CACHE_MAX_AGE
+    return response.make_conditional(request)
+
 # API Key (Hugging Face)
 hf_api_key = os.getenv("HF_API_KEY")
 
+# Shared HTTP session so HF calls reuse pooled keep-alive connections
+_HTTP = requests.Session()
+_HTTP.mount("https://", HTTPAdapter(pool_connections=16, pool_maxsize=64, max_retries=3))
+
+HF_IMAGE_URL = "https://api-inference.huggingface.co/models/stabilityai/stable-diffusion-xl-base-1.0"
+
+# Generated images cached on the normalized prompt; failed calls raise and are
+# not cached. SDXL PNGs are 1-2 MB, so keep the cache small per worker.
+@lru_cache(maxsize=32)
+def _generate(prompt):
+    headers = {"Authorization": f"Bearer {hf_api_key}", "X-use-cache": "true"}
+    response = _HTTP.post(HF_IMAGE_URL, headers=headers, json={"inputs": prompt}, timeout=(5, 120))
+    if response.status_code != 200:
+        raise requests.HTTPError(response=response)
+    return response.content
+
+HOME_HTML = b"""
+<!DOCTYPE html>
+<html>
+<head><title>GEN IQ</title></head>
+<body>
+    <h1>GEN IQ</h1>
+    <ul>
+        <li><a href="/text_to_image">Text-to-Image</a></li>
+        <li><a href="/text_to_audio">Text-to-Audio</a></li>
+        <li><a href="/summarize">Summarization</a></li>
+        <li><a href="/debug">Code Debugger</a></li>
+        <li><a href="/ats_score">ATS Score Checker</a></li>
+    </ul>
+</body>
+</html>
+"""
+HOME_ETAG = _etag(HOME_HTML)
+
 # Home page
 @app.route('/')
 def home():
-    html = """
-    <!DOCTYPE html>
-    <html>
-    <head><title>GEN IQ</title></head>
-    <body>
-        <h1>GEN IQ</h1>
-        <ul>
-            <li><a href="/text_to_image">Text-to-Image</a></li>
-            <li><a href="/text_to_audio">Text-to-Audio</a></li>
-            <li><a href="/summarize">Summarization</a></li>
-            <li><a href="/debug">Code Debugger</a></li>
-            <li><a href="/ats_score">ATS Score Checker</a></li>
-        </ul>
-    </body>
-    </html>
-    """
-    return html
+    return _html_page(HOME_HTML, HOME_ETAG)
+
+TEXT_TO_IMAGE_HTML = b"""
+<!DOCTYPE html>
+<html>
+<head><title>Text-to-Image</title></head>
+<body>
+    <h2>Text-to-Image Generation</h2>
+    <form method="POST">
+        <label>Prompt:</label><br>
+        <input type="text" name="prompt" value="A futuristic city"><br>
+        <input type="submit" value="Generate Image">
+    </form>
+</body>
+</html>
+"""
+TEXT_TO_IMAGE_ETAG = _etag(TEXT_TO_IMAGE_HTML)
 
 # 1. Text-to-Image
 @app.route('/text_to_image', methods=['GET', 'POST'])
 def text_to_image():
     if request.method == 'POST':
         prompt = request.form.get('prompt', 'A futuristic city')
+        if not prompt.strip():
+            return "Please enter a prompt.", 400
         if not hf_api_key:
             return "Hugging Face API key missing.", 400
-        url = "https://api-inference.huggingface.co/models/stabilityai/stable-diffusion-xl-base-1.0"
-        headers = {"Authorization": f"Bearer {hf_api_key}"}
-        payload = {"inputs": prompt}
         try:
-            response = requests.post(url, headers=headers, json=payload)
-            if response.status_code == 200:
-                img = Image.open(BytesIO(response.content))
-                img_io = BytesIO()
-                img.save(img_io, 'PNG')
-                img_io.seek(0)
-                return send_file(img_io, mimetype='image/png', as_attachment=True, download_name='generated_image.png')
-            else:
-                return f"API error: {response.status_code}", 500
+            image = _generate(prompt.strip().lower())
+            return send_file(BytesIO(image), mimetype='image/png', as_attachment=True, download_name='generated_image.png')
+        except requests.HTTPError as e:
+            return f"API error: {e.response.status_code}", 500
         except Exception as e:
             return f"Error: {str(e)}", 500
-    html = """
-    <!DOCTYPE html>
-    <html>
-    <head><title>Text-to-Image</title></head>
-    <body>
-        <h2>Text-to-Image Generation</h2>
-        <form method="POST">
-            <label>Prompt:</label><br>
-            <input type="text" name="prompt" value="A futuristic city"><br>
-            <input type="submit" value="Generate Image">
-        </form>
-    </body>
-    </html>
-    """
-    return html
+    return _html_page(TEXT_TO_IMAGE_HTML, TEXT_TO_IMAGE_ETAG)
+
+TEXT_TO_AUDIO_HTML = b"""
+<!DOCTYPE html>
+<html>
+<head><title>Text-to-Audio</title></head>
+<body>
+    <h2>Text-to-Audio Conversion</h2>
+    <form method="POST">
+        <label>Text:</label><br>
+        <textarea name="text">Hello, this is a test.</textarea><br>
+        <label>Language:</label><br>
+        <select name="lang">
+            <option value="en">English</option>
+            <option value="es">Spanish</option>
+            <option value="fr">French</option>
+        </select><br>
+        <input type="submit" value="Convert to Audio">
+    </form>
+</body>
+</html>
+"""
+TEXT_TO_AUDIO_ETAG = _etag(TEXT_TO_AUDIO_HTML)
 
 # 2. Text-to-Audio
 @app.route('/text_to_audio', methods=['GET', 'POST'])
@@ -97,37 +240,87 @@ def text_to_audio():
     if request.method == 'POST':
         text = request.form.get('text', 'Hello, this is a test.')
         lang = request.form.get('lang', 'en')
+        if not text.strip():
+            return "Please enter some text.", 400
+        # gTTS validates lang locally (including deprecated aliases like en-us)
+        # in its constructor, before any request to Google
         try:
-            with tempfile.NamedTemporaryFile(suffix=".mp3", delete=False) as tmp:
-                tts = gTTS(text=text, lang=lang, slow=False)
-                tts.save(tmp.name)
-                return send_file(tmp.name, mimetype='audio/mp3', as_attachment=True, download_name='output.mp3')
+            tts = gTTS(text=text, lang=lang, slow=False)
+        except ValueError:
+            return "Unsupported language.", 400
+        try:
+            # Stream audio chunks as gTTS produces them; pull the first one here so
+            # upstream errors still surface as a 500 rather than a truncated file
+            chunks = tts.stream()
+            first = next(chunks)
+            return Response(chain([first], chunks), mimetype='audio/mpeg',
+                            headers={'Content-Disposition': 'attachment; filename="output.mp3"'})
         except Exception as e:
             return f"Error: {str(e)}", 500
-        finally:
-            if os.path.exists(tmp.name):
-                os.unlink(tmp.name)
-    html = """
-    <!DOCTYPE html>
-    <html>
-    <head><title>Text-to-Audio</title></head>
-    <body>
-        <h2>Text-to-Audio Conversion</h2>
-        <form method="POST">
-            <label>Text:</label><br>
-            <textarea name="text">Hello, this is a test.</textarea><br>
-            <label>Language:</label><br>
-            <select name="lang">
-                <option value="en">English</option>
-                <option value="es">Spanish</option>
-                <option value="fr">French</option>
-            </select><br>
-            <input type="submit" value="Convert to Audio">
-        </form>
-    </body>
-    </html>
-    """
-    return html
+    return _html_page(TEXT_TO_AUDIO_HTML, TEXT_TO_AUDIO_ETAG)
+
+# Summaries are a pure function of (text, k), so whole responses are memoized.
+# Entries are keyed on a digest of the text (inputs can be 200k chars) and the
+# cache is bounded by both entry count and total response size; errors and
+# timeouts raise and are not cached.
+SUMMARY_CACHE_ENTRIES = 256
+SUMMARY_CACHE_CHARS = 4_000_000
+_summary_cache = OrderedDict()
+_summary_cache_chars = 0
+_summary_cache_lock = threading.Lock()
+
+def _summarize(text, k):
+    global _summary_cache_chars
+    key = (hashlib.blake2b(text.encode("utf-8", "surrogatepass"), digest_size=16).digest(), k)
+    with _summary_cache_lock:
+        result = _summary_cache.get(key)
+        if result is not None:
+            _summary_cache.move_to_end(key)
+            return result
+    result = _SUMMARY_POOL.run_all(_summarize_text, [(text, k)], CPU_TASK_TIMEOUT)[0]
+    size = len(result[0])
+    if size <= SUMMARY_CACHE_CHARS:
+        with _summary_cache_lock:
+            if key not in _summary_cache:
+                _summary_cache[key] = result
+                _summary_cache_chars += size
+                while len(_summary_cache) > SUMMARY_CACHE_ENTRIES or _summary_cache_chars > SUMMARY_CACHE_CHARS:
+                    _, (body, _) = _summary_cache.popitem(last=False)
+                    _summary_cache_chars -= len(body)
+    return result
+
+def _summarize_text(text, k):
+    sentences = _SENT_TOK.tokenize(text)
+    if len(sentences) < 2:
+        return "Please enter at least two sentences.", 400
+    if len(sentences) <= k:
+        return "\n".join(sentences), 200
+    word_freq = Counter(w for w in (m.group() for m in _TOKEN_RE.finditer(text.lower())) if w not in STOP_WORDS)
+    sent_tokens = [_TOKEN_RE.findall(sent.lower()) for sent in sentences]
+    scores = [(sum(word_freq.get(w, 0) for w in toks) / (len(toks) + 1), -i)
+              for i, toks in enumerate(sent_tokens)]
+    # Pick the top-k by score (ties favour earlier sentences), then restore original order
+    top = sorted(-i for _, i in heapq.nlargest(k, scores))
+    summary = [sentences[i] for i in top]
+    return "<pre>" + "\n".join(summary) + "</pre>", 200
+
+SUMMARIZE_HTML = b"""
+<!DOCTYPE html>
+<html>
+<head><title>Summarization</title></head>
+<body>
+    <h2>AI-Powered Summarization</h2>
+    <form method="POST">
+        <label>Text to Summarize:</label><br>
+        <textarea name="text" rows="10" cols="50">Paste your text here...</textarea><br>
+        <label>Number of Sentences:</label><br>
+        <input type="number" name="summary_sentences" value="2" min="1" max="5"><br>
+        <input type="submit" value="Summarize">
+    </form>
+</body>
+</html>
+"""
+SUMMARIZE_ETAG = _etag(SUMMARIZE_HTML)
 
 # 3. Summarization
 @app.route('/summarize', methods=['GET', 'POST'])
@@ -137,38 +330,33 @@ def summarize():
         summary_sentences = int(request.form.get('summary_sentences', 2))
         if not text.strip():
             return "Please enter some text.", 400
-        sentences = sent_tokenize(text)
-        if len(sentences) < 2:
-            return "Please enter at least two sentences.", 400
-        if len(sentences) <= summary_sentences:
-            return "\n".join(sentences), 200
-        stop_words = set(stopwords.words("english"))
-        words = [w.lower() for w in word_tokenize(text) if w.isalnum() and w.lower() not in stop_words]
-        word_freq = Counter(words)
-        sentence_scores = {}
-        for i, sent in enumerate(sentences):
-            score = sum(word_freq[w.lower()] for w in word_tokenize(sent) if w.isalnum() and w.lower() in word_freq)
-            sentence_scores[i] = score / (len(word_tokenize(sent)) + 1)
-        top_sentences = sorted(sorted(sentence_scores.items(), key=lambda x: x[0])[:summary_sentences], key=lambda x: x[1], reverse=True)
-        summary = [sentences[i] for i, _ in top_sentences]
-        return "<pre>" + "\n".join(summary) + "</pre>", 200
-    html = """
-    <!DOCTYPE html>
-    <html>
-    <head><title>Summarization</title></head>
-    <body>
-        <h2>AI-Powered Summarization</h2>
-        <form method="POST">
-            <label>Text to Summarize:</label><br>
-            <textarea name="text" rows="10" cols="50">Paste your text here...</textarea><br>
-            <label>Number of Sentences:</label><br>
-            <input type="number" name="summary_sentences" value="2" min="1" max="5"><br>
-            <input type="submit" value="Summarize">
-        </form>
-    </body>
-    </html>
-    """
-    return html
+        if len(text) > MAX_TEXT_CHARS:
+            return "Text too long.", 413
+        try:
+            return _summarize(text, summary_sentences)
+        except PoolBusy:
+            return "Server busy, please try again shortly.", 503
+        except FutureTimeout:
+            return "Summarization timed out.", 503
+        except BrokenProcessPool:
+            return "Summarization worker crashed, please try again.", 500
+    return _html_page(SUMMARIZE_HTML, SUMMARIZE_ETAG)
+
+DEBUG_HTML = b"""
+<!DOCTYPE html>
+<html>
+<head><title>Code Debugger</title></head>
+<body>
+    <h2>Code Debugger</h2>
+    <form method="POST">
+        <label>Your Code:</label><br>
+        <textarea name="code" rows="10" cols="50">def example():\n    print(undefined_variable)</textarea><br>
+        <input type="submit" value="Debug">
+    </form>
+</body>
+</html>
+"""
+DEBUG_ETAG = _etag(DEBUG_HTML)
 
 # 4. Code Debugger
 @app.route('/debug', methods=['GET', 'POST'])
@@ -176,35 +364,39 @@ def debug():
     if request.method == 'POST':
         code = request.form.get('code', '')
         try:
-            with tempfile.NamedTemporaryFile(suffix=".py", delete=False, mode="w") as tmp:
-                tmp.write(code)
-                tmp_path = tmp.name
-            output = StringIO()
-            reporter = TextReporter(output)
-            Run([tmp_path, "--reports=n"], reporter=reporter, exit=False)
-            lint_output = output.getvalue()
-            output.close()
-            os.unlink(tmp_path)
-            if lint_output.strip():
-                return "<pre>" + lint_output + "</pre>", 200
-            return "No issues detected by pylint.", 200
+            # ruff lints stdin directly: no tempfile and no in-process astroid import.
+            # --isolated ignores any pyproject.toml/ruff.toml near the server's cwd.
+            proc = subprocess.run(
+                [sys.executable, "-m", "ruff", "check", "--isolated", "--select=E4,E7,E9,F", "--no-cache",
+                 "--output-format=concise", "--stdin-filename", "input.py", "-"],
+                input=code, capture_output=True, text=True, timeout=10,
+            )
+            if proc.returncode == 0:
+                return "No issues detected by ruff.", 200
+            if proc.returncode == 1:
+                return "<pre>" + proc.stdout + "</pre>", 200
+            return f"Error: {proc.stderr.strip()}", 500
         except Exception as e:
             return f"Error: {str(e)}", 500
-    html = """
-    <!DOCTYPE html>
-    <html>
-    <head><title>Code Debugger</title></head>
-    <body>
-        <h2>Code Debugger</h2>
-        <form method="POST">
-            <label>Your Code:</label><br>
-            <textarea name="code" rows="10" cols="50">def example():\n    print(undefined_variable)</textarea><br>
-            <input type="submit" value="Debug">
-        </form>
-    </body>
-    </html>
-    """
-    return html
+    return _html_page(DEBUG_HTML, DEBUG_ETAG)
+
+ATS_SCORE_HTML = b"""
+<!DOCTYPE html>
+<html>
+<head><title>ATS Score Checker</title></head>
+<body>
+    <h2>ATS Score Checker</h2>
+    <form method="POST" enctype="multipart/form-data">
+        <label>Upload Resume (PDF):</label><br>
+        <input type="file" name="resume" accept=".pdf"><br>
+        <label>Job Description:</label><br>
+        <textarea name="job_desc" rows="5" cols="50">Enter here...</textarea><br>
+        <input type="submit" value="Check Score">
+    </form>
+</body>
+</html>
+"""
+ATS_SCORE_ETAG = _etag(ATS_SCORE_HTML)
 
 # 5. ATS Score Checker
 @app.route('/ats_score', methods=['GET', 'POST'])
@@ -214,35 +406,35 @@ def ats_score():
             return "ATS unavailable due to missing 'pymupdf'.", 400
         resume = request.files.get('resume')
         job_desc = request.form.get('job_desc', '')
-        if not resume or not job_desc:
+        if not resume or not job_desc.strip():
             return "Upload a resume and enter a job description.", 400
+        if len(job_desc) > MAX_TEXT_CHARS:
+            return "Job description too long.", 413
         try:
-            pdf = fitz.open(stream=resume.read(), filetype="pdf")
-            resume_text = "".join(page.get_text() for page in pdf)
-            resume_words = set(resume_text.lower().split())
-            job_words = set(job_desc.lower().split())
-            common = resume_words.intersection(job_words)
-            score = min(len(common) / len(job_words) * 100, 100)
+            data = resume.read()
+            with fitz.open(stream=data, filetype="pdf") as pdf:
+                pages = pdf.page_count
+                # A single-process pool gives no parallelism, so parse inline then too
+                if pages < PDF_PARALLEL_PAGES or _PDF_POOL.max_workers < 2:
+                    resume_words = _page_words(pdf, 0, pages)
+                else:
+                    step = -(-pages // _PDF_POOL.max_workers)
+                    chunks = [(data, start, min(start + step, pages)) for start in range(0, pages, step)]
+                    resume_words = set().union(*_PDF_POOL.run_all(_pdf_chunk_words, chunks, CPU_TASK_TIMEOUT))
+            job_words = set(_ATS_TOKEN_RE.findall(job_desc.lower()))
+            # Scan the (usually much smaller) job description set against the resume
+            common = [w for w in job_words if w in resume_words]
+            score = min(len(common) / max(len(job_words), 1) * 100, 100)
             return f"<pre>ATS Score: {score:.2f}%\nMatches: {', '.join(common)}</pre>", 200
+        except PoolBusy:
+            return "Server busy, please try again shortly.", 503
+        except FutureTimeout:
+            return "PDF extraction timed out.", 503
+        except BrokenProcessPool:
+            return "PDF extraction worker crashed, please try again.", 500
         except Exception as e:
             return f"Error: {str(e)}", 500
-    html = """
-    <!DOCTYPE html>
-    <html>
-    <head><title>ATS Score Checker</title></head>
-    <body>
-        <h2>ATS Score Checker</h2>
-        <form method="POST" enctype="multipart/form-data">
-            <label>Upload Resume (PDF):</label><br>
-            <input type="file" name="resume" accept=".pdf"><br>
-            <label>Job Description:</label><br>
-            <textarea name="job_desc" rows="5" cols="50">Enter here...</textarea><br>
-            <input type="submit" value="Check Score">
-        </form>
-    </body>
-    </html>
-    """
-    return html
+    return _html_page(ATS_SCORE_HTML, ATS_SCORE_ETAG)
 
 if __name__ == '__main__':
     port = int(os.getenv("PORT", 5000))
@@ -0,0 +1,8 @@
+# Production entry point:
+#   WEB_CONCURRENCY=4 gunicorn -k gevent --worker-connections 1000 wsgi:app
+# (set the worker count via WEB_CONCURRENCY, not -w, so app.py can size its process pools)
+# Patch blocking stdlib I/O (sockets, subprocess) before the app imports requests.
+from gevent import monkey
+monkey.patch_all()
+
+from app import app  # noqa: E402